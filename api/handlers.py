@@ -1,5 +1,6 @@
 """FastAPI route handlers."""
 
+import asyncio
 import json
 from json import JSONDecodeError
 from typing import Any
@@ -12,11 +13,15 @@ from core.exceptions import InvalidJSON, RequestTooLarge
 from ui.dashboard import Dashboard
 from ui.log_utils import write_incoming_log
 
+# Bodies larger than this are prepared in a worker thread, so sanitizing a long
+# conversation does not stall other requests on the event loop
+_OFFLOAD_BODY_SIZE = 256 * 1024
+
 
 async def _parse_json_body(
     request: Request, max_body_size: int
-) -> tuple[dict[str, Any], dict[str, str]]:
-    """Parse request body as JSON, return (body, headers)."""
+) -> tuple[dict[str, Any], dict[str, str], int]:
+    """Parse request body as JSON, return (body, headers, raw body size)."""
     raw_body = await request.body()
     if len(raw_body) > max_body_size:
         raise RequestTooLarge("Request body too large")
@@ -34,7 +39,7 @@ async def _parse_json_body(
 
     headers = dict(request.headers)
     write_incoming_log(request.method, request.url.path, headers, body)
-    return body, headers
+    return body, headers, len(raw_body)
 
 
 async def _handle_proxy_request(
@@ -54,21 +59,22 @@ async def _handle_proxy_request(
     Returns:
         Response or StreamingResponse from the upstream provider.
     """
-    body, headers = await _parse_json_body(request, config.limits.max_body_size)
+    body, headers, body_size = await _parse_json_body(request, config.limits.max_body_size)
 
     routing_service = request.app.state.routing_service
     if endpoint == "/v1/messages":
-        route, target_url, upstream_headers, prepared_body = routing_service.prepare_messages(
-            body, headers
-        )
+        prepare = routing_service.prepare_messages
+    else:
+        prepare = routing_service.prepare_count_tokens
+    if body_size > _OFFLOAD_BODY_SIZE:
+        prepared = await asyncio.to_thread(prepare, body, headers)
     else:
-        route, target_url, upstream_headers, prepared_body = routing_service.prepare_count_tokens(
-            body, headers
-        )
+        prepared = prepare(body, headers)
+    route, upstream_headers, prepared_body, content = prepared
 
     upstream = request.app.state.upstream_client
     return await upstream.proxy_request(
-        prepared_body, upstream_headers, target_url, logger, route, endpoint
+        prepared_body, content, upstream_headers, logger, route, endpoint
     )
 
 
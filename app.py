@@ -1,9 +1,9 @@
 """FastAPI application factory."""
 
-import json
 from contextlib import asynccontextmanager
 
 import httpx
+import orjson
 from fastapi import FastAPI, Request
 from fastapi.responses import Response
 
@@ -19,6 +19,17 @@ from services.routing_service import RoutingService
 from services.upstream import UpstreamClient
 from ui.dashboard import Dashboard
 
+_TOO_LARGE_BODY = b'{"error": "Request body too large"}'
+
+
+def _error_response(status_code: int, message: str) -> Response:
+    """Build a JSON error response; orjson escapes quotes/backslashes in message."""
+    return Response(
+        content=orjson.dumps({"error": message}),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
 
 def create_app(config: Config, logger: Dashboard) -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -35,6 +46,7 @@ def create_app(config: Config, logger: Dashboard) -> FastAPI:
             write=30.0,
             pool=config.limits.pool_timeout,
         )
+
         anthropic_client = httpx.AsyncClient(
             timeout=timeout,
             limits=limits,
@@ -52,9 +64,11 @@ def create_app(config: Config, logger: Dashboard) -> FastAPI:
             config=config,
             logger=logger,
         )
+        logger.start_log_worker()
         try:
             yield
         finally:
+            await logger.stop_log_worker()
             await anthropic_client.aclose()
             await zai_client.aclose()
 
@@ -63,34 +77,22 @@ def create_app(config: Config, logger: Dashboard) -> FastAPI:
     @app.exception_handler(RequestTooLarge)
     async def request_too_large_handler(request: Request, exc: RequestTooLarge) -> Response:
         return Response(
-            content='{"error": "Request body too large"}',
+            content=_TOO_LARGE_BODY,
             status_code=413,
             media_type="application/json",
         )
 
     @app.exception_handler(InvalidJSON)
     async def invalid_json_handler(request: Request, exc: InvalidJSON) -> Response:
-        return Response(
-            content=json.dumps({"error": str(exc)}),
-            status_code=400,
-            media_type="application/json",
-        )
+        return _error_response(400, str(exc))
 
     @app.exception_handler(UpstreamTimeoutError)
     async def upstream_timeout_handler(request: Request, exc: UpstreamTimeoutError) -> Response:
-        return Response(
-            content=json.dumps({"error": str(exc)}),
-            status_code=504,
-            media_type="application/json",
-        )
+        return _error_response(504, str(exc))
 
     @app.exception_handler(UpstreamConnectionError)
     async def upstream_connection_handler(request: Request, exc: UpstreamConnectionError) -> Response:
-        return Response(
-            content=json.dumps({"error": str(exc)}),
-            status_code=502,
-            media_type="application/json",
-        )
+        return _error_response(502, str(exc))
 
     @app.post("/v1/messages")
     async def proxy_messages(request: Request):
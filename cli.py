@@ -10,7 +10,7 @@ from app import create_app
 from auth import TOKENS_FILE, TokenRefreshError, load_tokens, print_auth_status
 from core.config import CONFIG_FILE, load_config
 from ui.dashboard import Dashboard
-from ui.log_utils import clear_logs, shutdown_log_executor, write_cli_log
+from ui.log_utils import clear_logs, set_pretty_logs, shutdown_log_writer, write_cli_log
 
 console = Console()
 
@@ -53,6 +53,7 @@ def main():
 
     # Clear previous logs and start dashboard
     clear_logs()
+    set_pretty_logs(config.proxy.debug)
     dashboard = Dashboard(config)
 
     import uvicorn
@@ -77,7 +78,7 @@ def main():
     finally:
         duration = datetime.now() - start_time
         write_cli_log("SHUTDOWN", "Proxy stopped", duration=str(duration))
-        shutdown_log_executor()
+        shutdown_log_writer()
         dashboard.stop()
 
 
@@ -5,7 +5,10 @@ from typing import Any
 
 def build_anthropic_headers(headers: dict[str, Any]) -> dict[str, str]:
     """Pass through auth and anthropic-* headers."""
-    upstream: dict[str, str] = {"Content-Type": "application/json"}
+    upstream: dict[str, str] = {
+        "Content-Type": "application/json",
+        "Accept-Encoding": "identity",
+    }
     for key, value in headers.items():
         key_lower = key.lower()
         if key_lower in ("authorization", "x-api-key") or key_lower.startswith("anthropic-"):
@@ -17,6 +20,7 @@ def build_zai_headers(headers: dict[str, Any], api_key: str) -> dict[str, str]:
     """Build upstream headers for z.ai."""
     return {
         "Content-Type": "application/json",
+        "Accept-Encoding": "identity",
         "x-api-key": api_key,
         "anthropic-version": str(headers.get("anthropic-version", "2023-06-01")),
     }
@@ -1,34 +1,47 @@
 """Request routing logic - determines Anthropic vs z.ai."""
 
-from typing import Any, Literal
-
-from core.sanitize.system_prompt import extract_system_text
+import re
+from typing import Literal
 
 Route = Literal["anthropic", "zai"]
 # (route, is_subagent)
 RouteResult = tuple[Route, bool]
 
 
+def compile_markers(markers: list[str]) -> re.Pattern[str] | None:
+    """Compile literal markers into one alternation (None if there are no markers).
+
+    Lets a system prompt be scanned once for all markers instead of once per marker.
+    """
+    if not markers:
+        return None
+    return re.compile("|".join(map(re.escape, markers)))
+
+
+def _matches(pattern: re.Pattern[str] | None, text: str) -> bool:
+    """Check if any marker in a compiled marker pattern occurs in text."""
+    return pattern is not None and pattern.search(text) is not None
+
+
 def decide_route(
-    body: dict[str, Any],
-    subagent_markers: list[str],
-    anthropic_markers: list[str],
+    system_text: str,
+    subagent_markers: re.Pattern[str] | None,
+    anthropic_markers: re.Pattern[str] | None,
 ) -> RouteResult:
     """Return route and subagent status based on system prompt patterns.
 
     Args:
-        body: Request body containing system prompt
-        subagent_markers: Markers that indicate z.ai routing
-        anthropic_markers: Markers that force Anthropic routing
+        system_text: System prompt text (see extract_system_text)
+        subagent_markers: Compiled markers that indicate z.ai routing
+        anthropic_markers: Compiled markers that force Anthropic routing
 
     Returns:
         Tuple of (route, is_subagent) where route is 'anthropic' or 'zai'
     """
-    system_text = extract_system_text(body.get("system"))
-    is_subagent = any(marker in system_text for marker in subagent_markers)
+    is_subagent = _matches(subagent_markers, system_text)
 
     # Check exclusions first - force Anthropic for specific agents
-    if any(marker in system_text for marker in anthropic_markers):
+    if _matches(anthropic_markers, system_text):
         return "anthropic", is_subagent
 
     # Route subagents to z.ai
@@ -5,10 +5,7 @@ providers. It removes unwanted tools, filters Task tool descriptions, strips
 system reminders, and replaces the system prompt.
 """
 
-import copy
-from typing import Any, Literal
-
-from core.transform import strip_anthropic_features_inplace
+from typing import Any
 
 from .bash_description import strip_bash_description_inplace
 from .edit_tools import relax_read_requirement_inplace
@@ -24,29 +21,45 @@ from .system_prompt import replace_system_prompt_inplace
 from .task_tool import filter_task_tool_inplace
 from .tools import strip_tools_inplace
 
-__all__ = ["sanitize"]
+__all__ = ["clone_request", "sanitize"]
+
+
+def clone_request(value: Any) -> Any:
+    """Deep copy a JSON request tree.
+
+    Only dicts and lists are copied; str/int/float/bool/None leaves are
+    immutable and shared, avoiding ``copy.deepcopy``'s memo and dispatch
+    overhead. Bodies come from ``json.loads`` so there are no shared
+    references or cycles to preserve.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return {k: clone_request(v) for k, v in value.items()}
+    if value_type is list:
+        return [clone_request(v) for v in value]
+    return value
 
 
 def sanitize(
     body: dict[str, Any],
     *,
-    target_provider: Literal["anthropic", "zai"] = "anthropic",
     strip_mcp: bool = True,
     strip_claude_md: bool = False,
     strip_tools: bool = True,
     strip_post_env: bool = False,
     replace_system_prompt: bool = True,
-    stripped_tools: set[str],
+    stripped_tools: frozenset[str],
     stripped_agents: list[str] | None = None,
     system_prompt: str | None = None,
+    copy: bool = True,
 ) -> dict[str, Any]:
     """Sanitize request body for upstream routing.
 
     Creates a single deep copy, then applies all transformations in place.
+    z.ai-specific transforms (``core.transform``) are applied by the caller.
 
     Args:
-        body: Original request body (not modified).
-        target_provider: Target provider ("anthropic" or "zai").
+        body: Original request body (not modified unless ``copy`` is False).
         strip_mcp: Whether to strip MCP tools (except allowlisted ones).
         strip_claude_md: Whether to strip CLAUDE.md context reminders (for subagents).
         strip_tools: Whether to strip tools from request.
@@ -55,11 +68,14 @@ def sanitize(
         stripped_tools: Set of tool names to strip (from config).
         stripped_agents: List of agent names to strip from Task tool description.
         system_prompt: Custom system prompt replacement.
+        copy: Whether to copy the body first. Pass False when the caller
+            already owns a copy (e.g. one made by ``core.transform``).
 
     Returns:
-        Sanitized copy of the request body.
+        Sanitized copy of the request body (the same object if ``copy`` is False).
     """
-    body = copy.deepcopy(body)
+    if copy:
+        body = clone_request(body)
 
     if strip_tools:
         strip_tools_inplace(body, strip_mcp=strip_mcp, stripped_tools=stripped_tools)
@@ -79,8 +95,4 @@ def sanitize(
     relax_read_requirement_inplace(body)
     strip_bash_description_inplace(body)
 
-    # z.ai-specific transforms
-    if target_provider == "zai":
-        strip_anthropic_features_inplace(body)
-
     return body
@@ -4,8 +4,8 @@ import re
 
 # MCP tool handling
 MCP_TOOL_PREFIX = "mcp__"
-MCP_TOOL_ALLOWLIST: set[str] = set()  # Exact tool names to allow
-MCP_TOOL_PREFIX_ALLOWLIST = {"mcp__semvex__"}  # Prefixes to allow (all tools from these servers)
+MCP_TOOL_ALLOWLIST: frozenset[str] = frozenset()  # Exact tool names to allow
+MCP_TOOL_PREFIX_ALLOWLIST = ("mcp__semvex__",)  # Prefixes to allow (tuple for str.startswith)
 
 # Tool result stripping patterns
 TOOL_RESULT_OUTPUT_WRAPPER = re.compile(r"<output>\n\s*(.*?)\s*\n</output>", re.DOTALL)
@@ -39,11 +39,20 @@ BASH_AGENT_NEW_DESC = (
 )
 
 # Noise patterns in system-reminders (not user instructions, safe to strip)
-NOISE_REMINDER_MARKERS = [
+NOISE_REMINDER_MARKERS = (
     "consider whether it would be considered malware",
     "SessionStart:",
     "UserPromptSubmit:",
-]
+)
+# Single alternation so all noise markers are found in one C-level scan of the text
+# (tuple above so the compiled pattern can't drift from the marker list)
+NOISE_REMINDER_RE = re.compile("|".join(re.escape(m) for m in NOISE_REMINDER_MARKERS))
+
+
+def contains_any_noise(text: str) -> bool:
+    """Check if text contains any of the NOISE_REMINDER_MARKERS."""
+    return NOISE_REMINDER_RE.search(text) is not None
+
 
 # Malware reminder pattern
 MALWARE_REMINDER_PATTERN = re.compile(
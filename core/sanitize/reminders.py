@@ -21,6 +21,9 @@ _MALWARE_MARKER = "you should consider whether it would be considered malware"
 def _content_contains(content: Any, marker: str) -> bool:
     """Check if content (str or list of blocks) contains marker text.
 
+    Request bodies come straight from ``json.loads``, so exact ``type() is``
+    checks are used instead of ``isinstance`` on this per-block hot path.
+
     Args:
         content: Content value to search (str, list, or other).
         marker: Text marker to search for.
@@ -28,19 +31,22 @@ def _content_contains(content: Any, marker: str) -> bool:
     Returns:
         True if marker is found in any text blocks, False otherwise.
     """
-    if isinstance(content, str):
+    content_type = type(content)
+    if content_type is str:
         return marker in content
-    if isinstance(content, list):
+    if content_type is list:
         for b in content:
-            if not isinstance(b, dict):
+            if type(b) is not dict:
                 continue
+            block_type = b.get("type")
             # Check text blocks
-            if b.get("type") == "text" and marker in b.get("text", ""):
-                return True
+            if block_type == "text":
+                if marker in b.get("text", ""):
+                    return True
             # Check tool_result blocks
-            if b.get("type") == "tool_result":
+            elif block_type == "tool_result":
                 tool_content = b.get("content", "")
-                if isinstance(tool_content, str) and marker in tool_content:
+                if type(tool_content) is str and marker in tool_content:
                     return True
     return False
 
@@ -51,8 +57,15 @@ def _contains_malware_marker(content: Any) -> bool:
 
 
 def _strip_malware_reminder(text: str) -> str:
-    """Strip malware reminder from text."""
-    return MALWARE_REMINDER_PATTERN.sub("", text)
+    """Strip malware reminder from text.
+
+    Anchors the regex at the first ``<system-reminder>`` so the lazy DOTALL
+    match never scans (or backtracks over) text that cannot contain it.
+    """
+    start = text.find("<system-reminder>")
+    if start == -1 or _MALWARE_MARKER not in text:
+        return text
+    return text[:start] + MALWARE_REMINDER_PATTERN.sub("", text[start:])
 
 
 def _apply_to_content_blocks(
@@ -68,15 +81,18 @@ def _apply_to_content_blocks(
     Returns:
         Transformed content in the same structure.
     """
-    if isinstance(content, str):
+    content_type = type(content)
+    if content_type is str:
         result = transform(content)
+        if result is content or result == content:
+            return content
         return result if result.strip() else content
-    if isinstance(content, list):
+    if content_type is list:
         to_remove: list[int] = []
         for i, block in enumerate(content):
-            if isinstance(block, dict) and block.get("type") == "text":
+            if type(block) is dict and block.get("type") == "text":
                 text = block.get("text", "")
-                if isinstance(text, str):
+                if type(text) is str:
                     result = transform(text)
                     if result.strip():
                         block["text"] = result
@@ -114,7 +130,9 @@ def _apply_to_messages(
         content = msg.get(content_key)
         if content_filter is not None and not content_filter(content):
             continue
-        msg[content_key] = _apply_to_content_blocks(content, transform)
+        new_content = _apply_to_content_blocks(content, transform)
+        if new_content is not content:
+            msg[content_key] = new_content
 
 
 def _apply_to_system(
@@ -131,7 +149,9 @@ def _apply_to_system(
     if not system:
         return
 
-    body["system"] = _apply_to_content_blocks(system, transform)
+    new_system = _apply_to_content_blocks(system, transform)
+    if new_system is not system:
+        body["system"] = new_system
 
 
 def strip_system_reminders_inplace(body: dict[str, Any]) -> None:
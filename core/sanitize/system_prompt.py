@@ -36,8 +36,7 @@ def replace_system_prompt_inplace(
 
     prompt = system_prompt or get_default_system_prompt()
     original_system = body.get("system")
-    original_text = extract_system_text(original_system)
-    merged_prompt = _merge_env(prompt, original_text)
+    merged_prompt = _merge_env(prompt, _find_env_in_system(original_system))
     normalized = _normalize_system(merged_prompt, original_system)
 
     if original_system != normalized:
@@ -55,9 +54,7 @@ def _normalize_system(system_prompt: str, original_system: Any) -> Any:
                 and isinstance(item.get("text"), str)
                 and "You are an interactive CLI tool" in item["text"]
             ):
-                new_item = dict(item)
-                new_item["text"] = system_prompt
-                updated.append(new_item)
+                updated.append({**item, "text": system_prompt})
                 replaced = True
             else:
                 updated.append(item)
@@ -97,9 +94,20 @@ def _extract_env_block(text: str) -> str | None:
     return text[start : end + len("</env>")]
 
 
-def _merge_env(base_prompt: str, original_system: str) -> str:
+def _find_env_in_system(system: Any) -> str | None:
+    """Find the <env>...</env> block in a system prompt without joining items."""
+    if isinstance(system, list):
+        for item in system:
+            text = str(item.get("text", "")) if isinstance(item, dict) else str(item)
+            env = _extract_env_block(text)
+            if env:
+                return env
+        return None
+    return _extract_env_block(str(system) if system else "")
+
+
+def _merge_env(base_prompt: str, original_env: str | None) -> str:
     """Merge env block from original system into base prompt."""
-    original_env = _extract_env_block(original_system)
     if not original_env:
         return base_prompt
     base_env = _extract_env_block(base_prompt)
@@ -1,5 +1,8 @@
 """Task tool description filtering."""
 
+import re
+from collections.abc import Callable
+from functools import lru_cache
 from typing import Any
 
 from .patterns import (
@@ -13,6 +16,68 @@ from .patterns import (
     build_agent_pattern,
 )
 
+# (pattern, replacement, literal that must be present for the pattern to match)
+_Rewrite = tuple[re.Pattern[str], str, str]
+
+# Static rewrites applied to the Task tool description, in priority order
+_TASK_TOOL_REWRITES: list[_Rewrite] = [
+    # Replace opening text
+    (OLD_OPENING_PATTERN, NEW_TASK_OPENING, "Launch a new agent"),
+    # Strip instruction and example sections
+    (CONTEXT_PATTERN, "", '- Agents with "access to current context"'),
+    (EXAMPLE_PATTERN, "", "Example usage:"),
+    # Strip "(Tools: ...)" from agent descriptions
+    (AGENT_TOOLS_PATTERN, "", " (Tools: "),
+    # Replace Bash agent description with more restrictive guidance
+    (BASH_AGENT_OLD_DESC, BASH_AGENT_NEW_DESC, "- Bash: Command execution"),
+]
+
+
+def _named_alternative(name: str, pattern: re.Pattern[str]) -> str:
+    """Wrap a pattern as a named group, keeping its DOTALL flag scoped to it."""
+    source = pattern.pattern
+    if pattern.flags & re.DOTALL:
+        source = f"(?s:{source})"
+    return f"(?P<{name}>{source})"
+
+
+# (combined pattern, sub() callback, trigger literals)
+_Rewriter = tuple[re.Pattern[str], Callable[[re.Match[str]], str], tuple[str, ...]]
+
+
+def _build_rewrite_pattern(rewrites: list[_Rewrite]) -> _Rewriter:
+    """Fuse rewrite patterns into one alternation scanned in a single pass.
+
+    Returns:
+        Tuple of (combined pattern, sub() callback returning the replacement
+        for whichever alternative matched, trigger literals of all rewrites).
+    """
+    alternatives: list[str] = []
+    replacements: dict[str, str] = {}
+    for i, (pattern, replacement, _) in enumerate(rewrites):
+        name = f"r{i}"
+        alternatives.append(_named_alternative(name, pattern))
+        replacements[name] = replacement
+
+    def _replacement(match: re.Match[str]) -> str:
+        return replacements[match.lastgroup or ""]
+
+    triggers = tuple(trigger for _, _, trigger in rewrites)
+    return re.compile("|".join(alternatives)), _replacement, triggers
+
+
+@lru_cache(maxsize=32)
+def _task_tool_pattern(stripped_agents: tuple[str, ...]) -> _Rewriter:
+    """Build the combined Task tool pattern for a set of stripped agents (cached).
+
+    Agent entries come first so they win over the Bash rewrite when both
+    match at the same position, preserving the original pass order.
+    """
+    agent_rewrites = [
+        (build_agent_pattern(agent), "", f"- {agent}:") for agent in stripped_agents
+    ]
+    return _build_rewrite_pattern(agent_rewrites + _TASK_TOOL_REWRITES)
+
 
 def filter_task_tool_inplace(
     body: dict[str, Any],
@@ -24,9 +89,6 @@ def filter_task_tool_inplace(
         body: Request body (modified in place).
         stripped_agents: List of agent names to strip from Task tool description.
     """
-    if stripped_agents is None:
-        stripped_agents = []
-
     tools = body.get("tools")
     if not isinstance(tools, list):
         return
@@ -38,23 +100,9 @@ def filter_task_tool_inplace(
         if not description:
             continue
 
-        # Replace opening text
-        description = OLD_OPENING_PATTERN.sub(NEW_TASK_OPENING, description)
-
-        # Filter out configured agent entries
-        for agent in stripped_agents:
-            pattern = build_agent_pattern(agent)
-            description = pattern.sub("", description)
-
-        # Strip instruction and example sections
-        description = CONTEXT_PATTERN.sub("", description)
-        description = EXAMPLE_PATTERN.sub("", description)
-
-        # Strip "(Tools: ...)" from agent descriptions
-        description = AGENT_TOOLS_PATTERN.sub("", description)
-
-        # Replace Bash agent description with more restrictive guidance
-        description = BASH_AGENT_OLD_DESC.sub(BASH_AGENT_NEW_DESC, description)
-
-        tool["description"] = description
+        pattern, replacement, triggers = _task_tool_pattern(tuple(stripped_agents or ()))
+        # Skip the regex scan entirely if no rewrite can match
+        if any(trigger in description for trigger in triggers):
+            # Strip configured agent entries and apply all rewrites in one scan
+            tool["description"] = pattern.sub(replacement, description)
         break
@@ -1,5 +1,6 @@
 """Tool stripping logic for request sanitization."""
 
+from collections.abc import Callable
 from typing import Any
 
 from .patterns import (
@@ -13,7 +14,7 @@ def strip_tools_inplace(
     body: dict[str, Any],
     *,
     strip_mcp: bool = True,
-    stripped_tools: set[str],
+    stripped_tools: frozenset[str],
 ) -> None:
     """Strip unwanted tools from the request body in place.
 
@@ -26,38 +27,57 @@ def strip_tools_inplace(
     if not isinstance(tools, list):
         return
 
-    stripped = stripped_tools
-    body["tools"] = [
-        tool for tool in tools if not _should_strip_tool(tool, stripped, strip_mcp)
-    ]
+    keep = _build_tool_filter(stripped_tools, strip_mcp)
+    # Probe first so the original list is kept when nothing is stripped
+    if not all(map(keep, tools)):
+        body["tools"] = list(filter(keep, tools))
 
     # Remove tool_choice if it references a stripped tool (using same logic as tool filtering)
     tool_choice = body.get("tool_choice")
-    if isinstance(tool_choice, dict):
-        name = tool_choice.get("name")
-        if name in stripped or (
-            strip_mcp
-            and isinstance(name, str)
-            and name.startswith(MCP_TOOL_PREFIX)
-            and name not in MCP_TOOL_ALLOWLIST
-            and not any(name.startswith(prefix) for prefix in MCP_TOOL_PREFIX_ALLOWLIST)
-        ):
-            body.pop("tool_choice", None)
-
-
-def _should_strip_tool(tool: Any, stripped_tools: set[str], strip_mcp: bool) -> bool:
-    """Determine if a tool should be stripped."""
-    if not isinstance(tool, dict):
-        return False
-    name = tool.get("name")
-    if not isinstance(name, str):
-        return False
-    if name in stripped_tools:
-        return True
-    if not strip_mcp or not name.startswith(MCP_TOOL_PREFIX):
-        return False
-    # Check exact allowlist
-    if name in MCP_TOOL_ALLOWLIST:
-        return False
-    # Check prefix allowlist (allow all tools from certain servers)
-    return not any(name.startswith(prefix) for prefix in MCP_TOOL_PREFIX_ALLOWLIST)
+    if isinstance(tool_choice, dict) and not keep(tool_choice):
+        body.pop("tool_choice", None)
+
+
+def _build_tool_filter(
+    stripped_tools: frozenset[str], strip_mcp: bool
+) -> Callable[[Any], bool]:
+    """Build a predicate returning True for tools to keep.
+
+    Specialized per request on ``strip_mcp`` so the per-tool check only does
+    the work that applies; anything without a string name is kept.
+    """
+    # Callers pass a frozenset built once; only wrap if given something else
+    stripped = (
+        stripped_tools if isinstance(stripped_tools, frozenset) else frozenset(stripped_tools)
+    )
+
+    if not strip_mcp:
+
+        def keep_unless_stripped(tool: Any) -> bool:
+            if type(tool) is not dict:
+                return True
+            name = tool.get("name")
+            return type(name) is not str or name not in stripped
+
+        return keep_unless_stripped
+
+    mcp_prefix = MCP_TOOL_PREFIX
+    mcp_allowlist = MCP_TOOL_ALLOWLIST
+    mcp_prefix_allowlist = MCP_TOOL_PREFIX_ALLOWLIST
+
+    def keep_unless_stripped_or_mcp(tool: Any) -> bool:
+        if type(tool) is not dict:
+            return True
+        name = tool.get("name")
+        if type(name) is not str:
+            return True
+        if name in stripped:
+            return False
+        # Keep non-MCP tools, exact allowlist, and allowlisted server prefixes
+        return (
+            not name.startswith(mcp_prefix)
+            or name in mcp_allowlist
+            or name.startswith(mcp_prefix_allowlist)
+        )
+
+    return keep_unless_stripped_or_mcp
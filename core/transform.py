@@ -2,53 +2,129 @@
 
 from typing import Any
 
-from core.sanitize.patterns import NOISE_REMINDER_MARKERS
+from core.sanitize import clone_request
+from core.sanitize.patterns import contains_any_noise
 
+# (tool_use_count, last_user_index, indices of messages that may hold noise reminders)
+MessageStats = tuple[int, int | None, list[int]]
 
-def strip_anthropic_features_inplace(body: dict[str, Any]) -> None:
-    """Strip Anthropic-specific features that z.ai/GLM may not support.
 
-    Modifies body in place. Caller must ensure body is already a deep copy.
+def clone_without_anthropic_features(body: dict[str, Any]) -> tuple[dict[str, Any], MessageStats]:
+    """Copy body for z.ai, dropping Anthropic-specific features while copying.
+
+    Fuses the request copy with feature stripping so the body is walked once:
+    ``metadata`` is skipped and ``cache_control`` is left out of system items
+    and message content blocks. Noise reminders can only be judged after the
+    sanitize passes have rewritten reminder text, so messages that may hold
+    them are recorded for ``strip_noise_reminders_inplace`` instead.
+
+    Args:
+        body: Original request body (not modified).
+
+    Returns:
+        Tuple of (copied body, message stats). Stats are tool_use blocks in
+        assistant messages, index of the last user message, and indices of
+        messages with ``<system-reminder>`` text blocks.
     """
-    # Remove metadata field
-    body.pop("metadata", None)
-
-    # Remove cache_control from system prompts
-    if isinstance(body.get("system"), list):
-        for item in body["system"]:
-            if isinstance(item, dict):
-                item.pop("cache_control", None)
-
-    # Process messages
-    if isinstance(body.get("messages"), list):
-        for msg in body["messages"]:
-            if isinstance(msg.get("content"), list):
-                # Filter out noise system-reminder blocks, preserve user context
-                filtered = [
-                    block
-                    for block in msg["content"]
-                    if not _is_noise_reminder(block)
-                ]
-                # Only update if we still have content (API rejects empty content lists)
-                if filtered:
-                    msg["content"] = filtered
-                # Remove cache_control from remaining blocks
-                for block in msg["content"]:
-                    if isinstance(block, dict):
-                        block.pop("cache_control", None)
-
-
-def _is_noise_reminder(block: dict) -> bool:
-    """Check if a system-reminder is noise (not user context like claudeMd)."""
-    if not isinstance(block, dict):
-        return False
-    if block.get("type") != "text":
-        return False
-    text = block.get("text", "")
-    if not isinstance(text, str) or "<system-reminder>" not in text:
+    stats: MessageStats = (0, None, [])
+    clone: dict[str, Any] = {}
+    for key, value in body.items():
+        # Remove metadata field
+        if key == "metadata":
+            continue
+        if key == "system" and type(value) is list:
+            # Remove cache_control from system prompts
+            clone[key] = [_clone_block(item) for item in value]
+        elif key == "messages" and type(value) is list:
+            clone[key], stats = _clone_messages(value)
+        else:
+            clone[key] = clone_request(value)
+    return clone, stats
+
+
+def _clone_messages(messages: list[Any]) -> tuple[list[Any], MessageStats]:
+    """Copy messages without content-block cache_control, collecting stats."""
+    tool_count = 0
+    last_user_index: int | None = None
+    noise_candidates: list[int] = []
+
+    cloned: list[Any] = []
+    for i, msg in enumerate(messages):
+        if type(msg) is not dict:
+            cloned.append(clone_request(msg))
+            continue
+        role = msg.get("role")
+        if role == "user":
+            last_user_index = i
+        content = msg.get("content")
+        if type(content) is not list:
+            cloned.append(clone_request(msg))
+            continue
+        is_assistant = role == "assistant"
+        has_reminder = False
+        new_content: list[Any] = []
+        for block in content:
+            if type(block) is dict:
+                block_type = block.get("type")
+                if block_type == "tool_use":
+                    if is_assistant:
+                        tool_count += 1
+                elif block_type == "text" and not has_reminder:
+                    text = block.get("text")
+                    has_reminder = type(text) is str and "<system-reminder>" in text
+            # Remove cache_control from content blocks
+            new_content.append(_clone_block(block))
+        if has_reminder:
+            noise_candidates.append(i)
+        cloned.append({k: new_content if k == "content" else clone_request(v) for k, v in msg.items()})
+
+    return cloned, (tool_count, last_user_index, noise_candidates)
+
+
+def _clone_block(block: Any) -> Any:
+    """Copy a system item or content block without its cache_control."""
+    if type(block) is not dict:
+        return clone_request(block)
+    return {k: clone_request(v) for k, v in block.items() if k != "cache_control"}
+
+
+def strip_noise_reminders_inplace(body: dict[str, Any], candidates: list[int]) -> None:
+    """Filter noise system-reminder blocks from the given messages in place.
+
+    Args:
+        body: Request body (modified in place).
+        candidates: Indices of messages that may hold noise reminders.
+    """
+    messages = body.get("messages")
+    if not isinstance(messages, list):
+        return
+    for i in candidates:
+        msg = messages[i]
+        content = msg.get("content")
+        if not isinstance(content, list):
+            continue
+        # Filter out noise system-reminder blocks, preserve user context
+        filtered = [
+            block
+            for block in content
+            if not (
+                type(block) is dict
+                and block.get("type") == "text"
+                and type(text := block.get("text")) is str
+                and _is_noise_text(text)
+            )
+        ]
+        # Only update if we still have content (API rejects empty content lists)
+        if filtered and len(filtered) != len(content):
+            msg["content"] = filtered
+
+
+def _is_noise_text(text: str) -> bool:
+    """Check if text block content is a noise system-reminder."""
+    if "<system-reminder>" not in text:
         return False
     # Preserve user context (CLAUDE.md content, rules, etc.)
     if "# claudeMd" in text:
         return False
-    # Strip known noise patterns
-    return any(pattern in text for pattern in NOISE_REMINDER_MARKERS)
+    # Strip known noise patterns (all markers checked in one scan)
+    return contains_any_noise(text)
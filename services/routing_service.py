@@ -1,17 +1,37 @@
 """Routing orchestration for proxy requests."""
 
+import json
 from typing import Any
 
+import orjson
+
 from core.config import Config
 from core.headers import build_anthropic_headers, build_zai_headers
-from core.router import Route, decide_route
+from core.router import Route, compile_markers, decide_route
 from core.sanitize import sanitize
 from core.sanitize.system_prompt import extract_system_text
-from core.tool_tracker import count_tool_uses, inject_tool_limit_reminder
+from core.tool_tracker import inject_tool_limit_reminder_inplace
+from core.transform import (
+    MessageStats,
+    clone_without_anthropic_features,
+    strip_noise_reminders_inplace,
+)
 from ui.dashboard import Dashboard
 
-# (route, target_url, headers, body)
-PreparedRequest = tuple[Route, str, dict[str, str], dict[str, Any]]
+# (route, headers, body, encoded body)
+PreparedRequest = tuple[Route, dict[str, str], dict[str, Any], bytes]
+
+
+def _encode_body(body: dict[str, Any]) -> bytes:
+    """Encode a request body as JSON for upstream.
+
+    orjson rejects integers wider than 64 bits, which json.loads accepts, so
+    such bodies fall back to the stdlib encoder.
+    """
+    try:
+        return orjson.dumps(body)
+    except TypeError:  # orjson.JSONEncodeError
+        return json.dumps(body).encode()
 
 
 class RoutingService:
@@ -22,10 +42,16 @@ class RoutingService:
         config: Config,
         logger: Dashboard,
     ) -> None:
-        self._config = config
         self._logger = logger
-        self._subagent_markers = config.routing.subagent_markers
-        self._anthropic_markers = config.routing.anthropic_markers
+        # Marker lists compiled once so each system prompt scan covers all markers
+        self._subagent_markers = compile_markers(config.routing.subagent_markers)
+        self._anthropic_markers = compile_markers(config.routing.anthropic_markers)
+        self._strip_claude_md_markers = compile_markers(config.sanitize.strip_claude_md_markers)
+        # Config is fixed for the process lifetime; bind what the hot path reads
+        self._stripped_tools = frozenset(config.sanitize.hidden_tools)
+        self._stripped_agents = config.sanitize.stripped_agents
+        self._tool_warning_threshold = config.limits.subagent_tool_warning
+        self._zai_api_key = config.zai.api_key
 
     def prepare_messages(
         self,
@@ -41,6 +67,7 @@ class RoutingService:
         target_provider: Route,
         is_subagent_request: bool,
         strip_claude_md: bool,
+        copy: bool = True,
     ) -> dict[str, Any]:
         """Apply sanitization rules to request body.
 
@@ -49,6 +76,7 @@ class RoutingService:
             target_provider: Target provider ("anthropic" or "zai")
             is_subagent_request: Whether this is a subagent request
             strip_claude_md: Whether to strip CLAUDE.md context
+            copy: Whether sanitize should copy the body first
 
         Returns:
             Sanitized request body
@@ -59,23 +87,22 @@ class RoutingService:
         strip_tools = not is_zai and not is_subagent_request
         return sanitize(
             body,
-            target_provider=target_provider,
             strip_mcp=not is_zai,
             strip_claude_md=strip_claude_md,
             strip_tools=strip_tools,
             strip_post_env=True,
             replace_system_prompt=not is_subagent_request,
-            stripped_tools=set(self._config.sanitize.hidden_tools),
-            stripped_agents=self._config.sanitize.stripped_agents,
+            stripped_tools=self._stripped_tools,
+            stripped_agents=self._stripped_agents,
+            copy=copy,
         )
 
-    def _should_strip_claude_md(self, body: dict[str, Any]) -> bool:
+    def _should_strip_claude_md(self, system_text: str) -> bool:
         """Check if CLAUDE.md should be stripped based on configured markers."""
-        markers = self._config.sanitize.strip_claude_md_markers
-        if not markers:
+        pattern = self._strip_claude_md_markers
+        if pattern is None or not system_text:
             return False
-        system_text = extract_system_text(body.get("system"))
-        return any(marker in system_text for marker in markers)
+        return pattern.search(system_text) is not None
 
     def prepare_count_tokens(
         self,
@@ -103,15 +130,25 @@ class RoutingService:
         Returns:
             Prepared request tuple
         """
-        route, is_subagent_request = decide_route(body, self._subagent_markers, self._anthropic_markers)
+        # Flatten the system prompt once for both routing and CLAUDE.md markers
+        system_text = extract_system_text(body.get("system"))
+        route, is_subagent_request = decide_route(
+            system_text, self._subagent_markers, self._anthropic_markers
+        )
 
         # Keep MCP tools for z.ai subagents, strip for main session
         # Strip CLAUDE.md context only for specific subagents (configured markers)
-        strip_claude_md = route == "zai" and self._should_strip_claude_md(body)
-        body = self._sanitize_request(body, route, is_subagent_request, strip_claude_md)
+        strip_claude_md = route == "zai" and self._should_strip_claude_md(system_text)
 
         if route == "zai":
-            return self._prepare_zai(body, headers, path, is_messages)
+            # Copy once while stripping Anthropic features, then sanitize that copy
+            body, stats = clone_without_anthropic_features(body)
+            body = self._sanitize_request(
+                body, route, is_subagent_request, strip_claude_md, copy=False
+            )
+            return self._prepare_zai(body, stats, headers, path, is_messages)
+
+        body = self._sanitize_request(body, route, is_subagent_request, strip_claude_md)
         return self._prepare_anthropic(body, headers, path, is_messages)
 
     def _log_request(
@@ -119,9 +156,9 @@ class RoutingService:
         route: Route,
         model: str,
         body: dict[str, Any],
+        content: bytes,
         path: str,
         is_messages: bool,
-        session_body: dict[str, Any] | None = None,
     ) -> None:
         """Log request to dashboard.
 
@@ -129,15 +166,17 @@ class RoutingService:
             route: Target route ('anthropic' or 'zai')
             model: Model name
             body: Request body
+            content: Request body as already encoded for upstream
             path: API path
             is_messages: Whether this is a /v1/messages request
-            session_body: Original session body (z.ai only)
         """
         if route == "anthropic":
             streaming = is_messages and body.get("stream", False)
-            self._logger.log_anthropic(model, body, streaming=streaming, path=path)
+            self._logger.log_anthropic(
+                model, body, streaming=streaming, path=path, body_json=content
+            )
         else:
-            self._logger.log_zai(model, body, {}, path=path, session_body=session_body)
+            self._logger.log_zai(model, body, {}, path=path, body_json=content)
 
     def _prepare_anthropic(
         self,
@@ -149,30 +188,36 @@ class RoutingService:
         """Prepare request for Anthropic."""
         model = body.get("model", "unknown")
         upstream_headers = build_anthropic_headers(headers)
-        self._log_request("anthropic", model, body, path, is_messages)
-        return "anthropic", self._config.anthropic.base_url, upstream_headers, body
+        # Encoded once; the same bytes go upstream and into the request log
+        content = _encode_body(body)
+        self._log_request("anthropic", model, body, content, path, is_messages)
+        return "anthropic", upstream_headers, body, content
 
     def _prepare_zai(
         self,
         body: dict[str, Any],
+        stats: MessageStats,
         headers: dict[str, Any],
         path: str,
         is_messages: bool,
     ) -> PreparedRequest:
-        """Prepare request for z.ai."""
-        # Note: inject_tool_limit_reminder returns a new dict, so session_body
-        # remains unchanged even after body is reassigned
-        session_body = body
-        model = body.get("model", "unknown")
+        """Prepare request for z.ai.
 
-        if is_messages:
-            threshold = self._config.limits.subagent_tool_warning
-            if threshold > 0:
-                tool_count = count_tool_uses(body.get("messages", []))
-                body = inject_tool_limit_reminder(body, tool_count, threshold)
-            self._log_request("zai", model, body, path, is_messages, session_body=session_body)
-        else:
-            self._log_request("zai", model, body, path, is_messages)
+        Body is the sanitized copy from clone_without_anthropic_features, so
+        the remaining z.ai transforms run in place using its message stats.
+        """
+        tool_count, last_user_index, noise_candidates = stats
+        strip_noise_reminders_inplace(body, noise_candidates)
+        model = body.get("model", "unknown")
 
-        upstream_headers = build_zai_headers(headers, self._config.zai.api_key)
-        return "zai", self._config.zai.base_url, upstream_headers, body
+        threshold = self._tool_warning_threshold
+        # Below the first tier there is no reminder to inject
+        if is_messages and 0 < threshold <= tool_count:
+            inject_tool_limit_reminder_inplace(
+                body, tool_count, threshold, last_user_index=last_user_index
+            )
+        content = _encode_body(body)
+        self._log_request("zai", model, body, content, path, is_messages)
+
+        upstream_headers = build_zai_headers(headers, self._zai_api_key)
+        return "zai", upstream_headers, body, content
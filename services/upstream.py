@@ -1,11 +1,11 @@
 """HTTP proxying utilities for upstream requests."""
 
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
 import httpx
 from fastapi import Response
 from fastapi.responses import StreamingResponse
-from starlette.background import BackgroundTask
 
 from core.config import Config
 from core.exceptions import UpstreamConnectionError, UpstreamTimeoutError
@@ -14,22 +14,66 @@ from ui.dashboard import Dashboard
 
 _DISPLAY_NAMES: dict[Route, str] = {"anthropic": "Anthropic", "zai": "z.ai"}
 
+_Handler = Callable[..., Awaitable[Response]]
 
-def _build_response(response: httpx.Response) -> Response:
-    """Build a FastAPI Response from an httpx Response.
+# (handler, client, url, timeout, display_name) for a (route, endpoint, is_streaming) key
+_Target = tuple[_Handler, httpx.AsyncClient, str, httpx.Timeout, str]
 
-    Args:
-        response: The httpx Response to convert.
 
-    Returns:
-        A FastAPI Response with status, content, and media type from the
-        httpx Response.
+# Error bodies are only logged truncated, so never decode more than this
+_ERROR_PREVIEW_BYTES = 4096
+
+
+def _error_preview(content: bytes) -> str:
+    """Decode the leading part of an upstream error body for logging."""
+    return content[:_ERROR_PREVIEW_BYTES].decode("utf-8", errors="replace")
+
+
+def _body_chunks(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Iterate the upstream body as it should be forwarded.
+
+    Uncompressed bodies (the norm, since requests ask for identity encoding)
+    are forwarded raw, skipping httpx's decoder layer. No chunk_size is
+    passed: httpx would then hold data back until that many bytes arrive,
+    stalling SSE events, whereas without one each upstream read is passed on
+    as it arrives.
+    """
+    if "content-encoding" in response.headers:
+        return response.aiter_bytes()
+    return response.aiter_raw()
+
+
+async def _stream_and_close(response: httpx.Response) -> AsyncIterator[bytes]:
+    """Yield the upstream body, closing the response when iteration ends.
+
+    The close runs on the task consuming the stream, including when the
+    client disconnects mid-stream, so the connection returns to the pool
+    right away.
+    """
+    try:
+        async for chunk in _body_chunks(response):
+            yield chunk
+    finally:
+        await response.aclose()
+
+
+async def _stream_error_and_close(
+    response: httpx.Response, logger: Dashboard, route_name: str
+) -> AsyncIterator[bytes]:
+    """Yield an upstream error body, then close the response and log the error.
+
+    Only the leading bytes needed for the log are kept, so large error bodies
+    are never buffered whole.
     """
-    return Response(
-        content=response.content,
-        status_code=response.status_code,
-        media_type=response.headers.get("content-type", "application/json"),
-    )
+    preview = b""
+    try:
+        async for chunk in _body_chunks(response):
+            if len(preview) < _ERROR_PREVIEW_BYTES:
+                preview += chunk
+            yield chunk
+    finally:
+        await response.aclose()
+        logger.log_error(route_name, response.status_code, _error_preview(preview))
 
 
 class UpstreamClient:
@@ -41,17 +85,46 @@ class UpstreamClient:
         zai_client: httpx.AsyncClient,
         config: Config,
     ) -> None:
-        self._clients: dict[Route, httpx.AsyncClient] = {
-            "anthropic": anthropic_client,
-            "zai": zai_client,
+        limits = config.limits
+        # Endpoint timeouts bound reads and writes; connecting (TCP + TLS, or
+        # opening an HTTP/2 stream) and waiting for the pool keep their own limits
+        message_timeout = httpx.Timeout(
+            limits.message_timeout, connect=limits.connect_timeout, pool=limits.pool_timeout
+        )
+        token_count_timeout = httpx.Timeout(
+            limits.token_count_timeout, connect=limits.connect_timeout, pool=limits.pool_timeout
+        )
+        # (endpoint, is_streaming) -> (handler, timeout)
+        handlers: dict[tuple[str, bool], tuple[_Handler, httpx.Timeout]] = {
+            ("/v1/messages", True): (self._streaming_request, message_timeout),
+            ("/v1/messages", False): (self._non_streaming_request, message_timeout),
+            # count_tokens is never streamed upstream, whatever the body says;
+            # its small reply is buffered and sent with a Content-Length
+            ("/v1/messages/count_tokens", True): (self._non_streaming_request, token_count_timeout),
+            ("/v1/messages/count_tokens", False): (self._non_streaming_request, token_count_timeout),
+        }
+        routes: dict[Route, tuple[httpx.AsyncClient, str]] = {
+            "anthropic": (anthropic_client, config.anthropic.base_url),
+            "zai": (zai_client, config.zai.base_url),
+        }
+        # Everything proxy_request needs, including the full URL, resolved once
+        self._targets: dict[tuple[Route, str, bool], _Target] = {
+            (route, endpoint, is_streaming): (
+                handler,
+                client,
+                f"{base_url}{endpoint}",
+                timeout,
+                _DISPLAY_NAMES[route],
+            )
+            for route, (client, base_url) in routes.items()
+            for (endpoint, is_streaming), (handler, timeout) in handlers.items()
         }
-        self._config = config
 
     async def proxy_request(
         self,
         body: dict[str, Any],
+        content: bytes,
         headers: dict[str, str],
-        target_url: str,
         logger: Dashboard,
         route: Route,
         endpoint: str = "/v1/messages",
@@ -60,35 +133,26 @@ class UpstreamClient:
 
         Args:
             body: Request body as JSON-serializable dict.
+            content: The same body encoded as JSON, sent as-is.
             headers: Request headers.
-            target_url: Base URL of the target provider.
             logger: Logger for request/response tracking.
-            route: Route key for client selection.
+            route: Route key for client and base URL selection.
             endpoint: Endpoint path (default: /v1/messages).
 
         Returns:
-            Response or StreamingResponse from upstream.
+            StreamingResponse for streaming /v1/messages, otherwise a
+            buffered Response.
 
         Raises:
             UpstreamTimeoutError: If the upstream request times out.
             UpstreamConnectionError: If connection to upstream fails.
         """
-        client = self._clients[route]
-        display_name = _DISPLAY_NAMES[route]
-        is_streaming = body.get("stream", False)
+        handler, client, url, timeout, display_name = self._targets[
+            route, endpoint, bool(body.get("stream", False))
+        ]
 
         try:
-            if endpoint == "/v1/messages/count_tokens":
-                return await self._count_tokens_request(
-                    client, body, headers, target_url, logger, display_name
-                )
-            if is_streaming:
-                return await self._streaming_request(
-                    client, body, headers, target_url, logger, display_name
-                )
-            return await self._non_streaming_request(
-                client, body, headers, target_url, logger, display_name
-            )
+            return await handler(client, content, headers, url, logger, display_name, timeout)
         except httpx.TimeoutException as e:
             logger.log_error(display_name, 504, "Upstream timeout")
             raise UpstreamTimeoutError(
@@ -105,39 +169,24 @@ class UpstreamClient:
                 f"Request error to {display_name}: {e}", provider=route
             ) from e
 
-    async def _count_tokens_request(
-        self,
-        client: httpx.AsyncClient,
-        body: dict[str, Any],
-        headers: dict[str, str],
-        target_url: str,
-        logger: Dashboard,
-        route_name: str,
-    ) -> Response:
-        """Handle /v1/messages/count_tokens request."""
-        response = await client.post(
-            f"{target_url}/v1/messages/count_tokens",
-            json=body,
-            headers=headers,
-            timeout=self._config.limits.token_count_timeout,
-        )
-        self._log_non_200(response, logger, route_name)
-        return _build_response(response)
-
     async def _streaming_request(
         self,
         client: httpx.AsyncClient,
-        body: dict[str, Any],
+        content: bytes,
         headers: dict[str, str],
-        target_url: str,
+        url: str,
         logger: Dashboard,
         route_name: str,
-    ) -> Response | StreamingResponse:
+        timeout: httpx.Timeout,
+    ) -> StreamingResponse:
         """Handle streaming request with proper status code propagation.
 
+        Args:
+            timeout: Request timeout.
+
         Returns:
-            Response for non-200 status codes (e.g., 400 from Anthropic),
-            or StreamingResponse for successful streaming requests.
+            StreamingResponse carrying the upstream status code; non-200
+            bodies (e.g., 400 from Anthropic) are forwarded and logged too.
 
         Raises:
             httpx.TimeoutException: If the upstream request times out.
@@ -146,66 +195,54 @@ class UpstreamClient:
         """
         req = client.build_request(
             "POST",
-            f"{target_url}/v1/messages",
-            json=body,
+            url,
+            content=content,
             headers=headers,
-            timeout=self._config.limits.message_timeout,
+            timeout=timeout,
         )
         response = await client.send(req, stream=True)
 
         if response.status_code != 200:
-            error_body = await response.aread()
-            logger.log_error(route_name, response.status_code, error_body.decode())
-            await response.aclose()
-            # Return error response for non-200 status codes
-            # (e.g., 400 from Anthropic for invalid requests)
-            error_response = httpx.Response(
+            # Forward error bodies (e.g., 400 from Anthropic for invalid
+            # requests) as they arrive; they are logged once fully sent
+            return StreamingResponse(
+                _stream_error_and_close(response, logger, route_name),
                 status_code=response.status_code,
-                content=error_body,
-                headers=response.headers,
-                request=response.request,
+                media_type=response.headers.get("content-type", "application/json"),
             )
-            return _build_response(error_response)
 
         return StreamingResponse(
-            response.aiter_bytes(),
+            _stream_and_close(response),
             status_code=200,
             media_type=response.headers.get("content-type", "text/event-stream"),
-            background=BackgroundTask(self._cleanup_streaming, response),
         )
 
-    async def _cleanup_streaming(self, response: httpx.Response) -> None:
-        """Clean up streaming resources."""
-        await response.aclose()
-
     async def _non_streaming_request(
         self,
         client: httpx.AsyncClient,
-        body: dict[str, Any],
+        content: bytes,
         headers: dict[str, str],
-        target_url: str,
+        url: str,
         logger: Dashboard,
         route_name: str,
+        timeout: httpx.Timeout,
     ) -> Response:
-        """Handle non-streaming request.
+        """Handle non-streaming request (including count_tokens).
+
+        The upstream body is read in full before responding, so a read
+        failure still surfaces here (and maps to 504/502) instead of after
+        a 200 has been sent.
 
         Raises:
             httpx.TimeoutException: If the upstream request times out.
             httpx.ConnectError: If connection to upstream fails.
             httpx.RequestError: If the request fails for other reasons.
         """
-        response = await client.post(
-            f"{target_url}/v1/messages",
-            json=body,
-            headers=headers,
-            timeout=self._config.limits.message_timeout,
-        )
-        self._log_non_200(response, logger, route_name)
-        return _build_response(response)
-
-    def _log_non_200(
-        self, response: httpx.Response, logger: Dashboard, route_name: str
-    ) -> None:
-        """Log error if response status code is not 200."""
+        response = await client.post(url, content=content, headers=headers, timeout=timeout)
         if response.status_code != 200:
-            logger.log_error(route_name, response.status_code, response.text)
+            logger.log_error(route_name, response.status_code, _error_preview(response.content))
+        return Response(
+            content=response.content,
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type", "application/json"),
+        )
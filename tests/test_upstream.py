@@ -0,0 +1,78 @@
+"""Tests for forwarding upstream responses."""
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+import httpx
+
+from services.upstream import UpstreamClient
+
+_CONFIG = SimpleNamespace(
+    limits=SimpleNamespace(
+        message_timeout=5.0,
+        token_count_timeout=5.0,
+        connect_timeout=1.0,
+        pool_timeout=1.0,
+    ),
+    anthropic=SimpleNamespace(base_url="https://anthropic.test"),
+    zai=SimpleNamespace(base_url="https://zai.test"),
+)
+
+
+class _Logger:
+    def __init__(self) -> None:
+        self.errors: list[tuple[str, int, str]] = []
+
+    def log_error(self, route: str, status: int, message: str) -> None:
+        self.errors.append((route, status, message))
+
+
+class _HeldOpenStream(httpx.AsyncByteStream):
+    """Upstream body that sends one event, then stays open until released."""
+
+    def __init__(self, release: asyncio.Event) -> None:
+        self._release = release
+
+    async def __aiter__(self):
+        yield b"data: event0\n\n"
+        await self._release.wait()
+        yield b"data: event1\n\n"
+
+
+class StreamingForwardTest(unittest.IsolatedAsyncioTestCase):
+    async def _first_chunk_before_close(self, status_code: int) -> None:
+        release = asyncio.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                status_code,
+                stream=_HeldOpenStream(release),
+                headers={"content-type": "text/event-stream"},
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        upstream = UpstreamClient(client, client, _CONFIG)  # type: ignore[arg-type]
+        response = await upstream.proxy_request(
+            {"stream": True}, b'{"stream":true}', {}, _Logger(), "anthropic"  # type: ignore[arg-type]
+        )
+        body = response.body_iterator
+
+        # The upstream is still open, so this only completes if the event
+        # is forwarded as soon as it is read
+        first = await asyncio.wait_for(anext(body), timeout=1.0)
+        self.assertEqual(first, b"data: event0\n\n")
+
+        release.set()
+        self.assertEqual([chunk async for chunk in body], [b"data: event1\n\n"])
+        await client.aclose()
+
+    async def test_event_forwarded_before_upstream_closes(self) -> None:
+        await self._first_chunk_before_close(200)
+
+    async def test_error_body_forwarded_before_upstream_closes(self) -> None:
+        await self._first_chunk_before_close(529)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 """Real-time CLI dashboard for proxy monitoring."""
 
+import asyncio
+from collections import deque
+from collections.abc import Callable
 from datetime import datetime
+from functools import partial
 from threading import Lock
 from typing import Any
 
@@ -12,10 +16,19 @@ from rich.table import Table
 from rich.text import Text
 
 from core.config import Config
-from ui.log_utils import extract_request_info, write_anthropic_log, write_cli_log, write_zai_log
+from ui.log_utils import (
+    extract_prompt,
+    format_cli_line,
+    write_anthropic_log,
+    write_cli_log,
+    write_zai_log,
+)
 
 console = Console()
 
+# Pending dashboard/log records; beyond this, new records are dropped
+_LOG_QUEUE_SIZE = 20_000
+
 
 def _truncate(text: str, max_len: int, suffix: str = "...") -> str:
     """Truncate text to max_len, adding suffix if truncated."""
@@ -38,19 +51,29 @@ class Dashboard:
         self.config = config
         self._lock = Lock()
         self._main_session: RequestInfo | None = None
-        self._subagents: list[RequestInfo] = []
-        self._max_subagents = 6
+        # Newest first; bounded deques evict the oldest entry on appendleft
+        self._subagents: deque[RequestInfo] = deque(maxlen=6)
         self._request_count = {"anthropic": 0, "zai": 0}
-        self._errors: list[str] = []
+        self._errors: deque[str] = deque(maxlen=3)
         self._live: Live | None = None
+        # Last rendered layout, rebuilt only after state changes
+        self._layout: Layout | None = None
+        self._dirty = True
+        self._log_queue: asyncio.Queue[Callable[[], None]] = asyncio.Queue(
+            maxsize=_LOG_QUEUE_SIZE
+        )
+        self._log_worker: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._dropped = 0
 
     def start(self) -> "Dashboard":
         """Start the live dashboard."""
+        # Live repaints on its own timer and pulls the layout via _render
         live = Live(
-            self._build_layout(),
             console=console,
             refresh_per_second=4,
             screen=False,
+            get_renderable=self._render,
         )
         live.start()
         self._live = live
@@ -61,6 +84,59 @@ class Dashboard:
         if self._live:
             self._live.stop()
 
+    def start_log_worker(self) -> None:
+        """Start draining request logs in a background task.
+
+        Must be called from a running event loop. Until then, requests are
+        logged inline.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._log_worker = asyncio.create_task(self._drain_log_queue())
+
+    async def stop_log_worker(self) -> None:
+        """Flush pending request logs and stop the background task."""
+        worker, self._log_worker = self._log_worker, None
+        if worker is None:
+            return
+        await self._log_queue.join()
+        worker.cancel()
+
+    async def _drain_log_queue(self) -> None:
+        """Record queued requests one at a time, off the request path."""
+        while True:
+            record = await self._log_queue.get()
+            try:
+                record()
+            except Exception as e:
+                write_cli_log("ERROR", f"Request log failed: {e}")
+            finally:
+                self._log_queue.task_done()
+
+    def _enqueue(self, record: Callable[[], None]) -> None:
+        """Queue a log record, or run it inline if no worker is running.
+
+        Safe to call from worker threads (offloaded request preparation).
+        """
+        if self._log_worker is None or self._loop is None:
+            record()
+            return
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._put_record(record)
+        else:
+            self._loop.call_soon_threadsafe(self._put_record, record)
+
+    def _put_record(self, record: Callable[[], None]) -> None:
+        """Put a log record on the queue, dropping it if the queue is full."""
+        try:
+            self._log_queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            self._dirty = True
+
     def log_anthropic(
         self,
         model: str,
@@ -68,15 +144,32 @@ class Dashboard:
         streaming: bool = False,
         *,
         path: str,
+        body_json: bytes | None = None,
     ) -> None:
         """Log a request routed to Anthropic (main session)."""
-        # Always write logs
-        write_anthropic_log(model, body, streaming, path=path)
-        prompt, _ = extract_request_info(body)
-        write_cli_log("ANTHROPIC", _truncate(prompt, 200) if prompt else "", model=model)
+        self._enqueue(partial(self._record_anthropic, model, body, streaming, path, body_json))
+
+    def _record_anthropic(
+        self,
+        model: str,
+        body: dict[str, Any],
+        streaming: bool,
+        path: str,
+        body_json: bytes | None,
+    ) -> None:
+        """Write logs and update the main session panel."""
+        prompt = extract_prompt(body)
+        # Always write logs; the request log and CLI line go out as one job
+        cli_line = format_cli_line(
+            "ANTHROPIC", _truncate(prompt, 200) if prompt else "", model=model
+        )
+        write_anthropic_log(
+            model, body, streaming, path=path, body_json=body_json, cli_line=cli_line
+        )
 
         with self._lock:
             self._request_count["anthropic"] += 1
+            self._dirty = True
 
             # Skip dashboard update for count_tokens and haiku models
             if path == "/v1/messages/count_tokens" or "haiku" in model.lower():
@@ -87,7 +180,6 @@ class Dashboard:
                 prompt=prompt,
                 timestamp=datetime.now(),
             )
-            self._refresh()
 
     def log_zai(
         self,
@@ -96,12 +188,23 @@ class Dashboard:
         headers: dict[str, str],
         *,
         path: str,
-        session_body: dict[str, Any] | None = None,
+        body_json: bytes | None = None,
     ) -> None:
         """Log a request routed to z.ai (subagent)."""
-        prompt, _ = extract_request_info(body)
-        write_zai_log(body, headers, path=path, session_body=session_body)
-        write_cli_log("ZAI", _truncate(prompt, 200) if prompt else "", model=model)
+        self._enqueue(partial(self._record_zai, model, body, headers, path, body_json))
+
+    def _record_zai(
+        self,
+        model: str,
+        body: dict[str, Any],
+        headers: dict[str, str],
+        path: str,
+        body_json: bytes | None,
+    ) -> None:
+        """Write logs and update the subagents panel."""
+        prompt = extract_prompt(body)
+        cli_line = format_cli_line("ZAI", _truncate(prompt, 200) if prompt else "", model=model)
+        write_zai_log(body, headers, path=path, body_json=body_json, cli_line=cli_line)
 
         with self._lock:
             self._request_count["zai"] += 1
@@ -110,23 +213,24 @@ class Dashboard:
                 prompt=prompt,
                 timestamp=datetime.now(),
             )
-            self._subagents.insert(0, info)
-            self._subagents = self._subagents[: self._max_subagents]
-            self._refresh()
+            self._subagents.appendleft(info)
+            self._dirty = True
 
     def log_error(self, route: str, status: int, message: str) -> None:
         """Log an error."""
         with self._lock:
             truncated = _truncate(message, 50)
-            self._errors.insert(0, f"{route} {status}: {truncated}")
-            self._errors = self._errors[:3]
-            self._refresh()
+            self._errors.appendleft(f"{route} {status}: {truncated}")
+            self._dirty = True
             write_cli_log("ERROR", _truncate(message, 200), route=route, status=status)
 
-    def _refresh(self) -> None:
-        """Refresh the display."""
-        if self._live:
-            self._live.update(self._build_layout())
+    def _render(self) -> Layout:
+        """Return the layout for Live, rebuilding it only if state changed."""
+        with self._lock:
+            if self._dirty or self._layout is None:
+                self._layout = self._build_layout()
+                self._dirty = False
+            return self._layout
 
     def _build_layout(self) -> Layout:
         """Build the dashboard layout."""
@@ -167,6 +271,9 @@ class Dashboard:
         stats.append(f"z.ai: {self._request_count['zai']}", style="magenta")
         stats.append("  |  ")
         stats.append(f"Port: {self.config.proxy.port}", style="dim")
+        if self._dropped:
+            stats.append("  |  ")
+            stats.append(f"Dropped logs: {self._dropped}", style="yellow")
 
         return Panel(stats, style="cyan")
 
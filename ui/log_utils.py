@@ -1,64 +1,186 @@
 """Shared logging utilities.
 
-All disk I/O is offloaded to a background thread pool so log writes
-never block the async event loop.
+All disk I/O is offloaded to a single background writer thread so log
+writes never block the async event loop.
 """
 
 import json
 import re
 import shutil
-from concurrent.futures import ThreadPoolExecutor
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import suppress
 from datetime import UTC, datetime
+from itertools import count
 from pathlib import Path
-from typing import Any
-from uuid import uuid4
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+from typing import Any, BinaryIO
+
+import orjson
 
 LOG_ROOT = Path.cwd() / "logs"
 CLI_LOG_FILE = LOG_ROOT / "proxy.log"
+# Incoming and z.ai requests are appended, one JSON object per line, to this
+# file in their (session) folder
+_JSONL_NAME = "log.jsonl"
+_ANTHROPIC_DIR = LOG_ROOT / "anthropic"
+_ZAI_DIR = LOG_ROOT / "zai"
+_INCOMING_DIR = LOG_ROOT / "incoming"
+
+# orjson options for the Anthropic snapshot files; see set_pretty_logs
+_json_option = 0
+
+# Disambiguates log filenames written within the same microsecond
+_filename_counter = count()
+
+# Latest Anthropic log file per folder; only the writer thread touches this
+_last_written: dict[Path, Path] = {}
+
+# Hash of the request behind each folder's latest Anthropic log, so an
+# identical retry is not written again; only the writer thread touches this
+_last_written_key: dict[Path, int] = {}
 
-_log_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-writer")
+# Log folders already created; only the writer thread touches this
+_known_dirs: set[Path] = set()
+
+# (writer, args) jobs for the writer thread; None tells it to stop
+_LogJob = tuple[Callable[..., Any], tuple[Any, ...]]
+_log_queue: SimpleQueue[_LogJob | None] = SimpleQueue()
+
+# Pending writes beyond this are dropped (and counted) rather than letting a
+# slow disk grow the queue without bound
+_MAX_PENDING_WRITES = 10_000
+_dropped_writes = 0
+_dropped_lock = Lock()
+
+# Append-only log files kept open across writes and flushed whenever the
+# writer goes idle; the lock lets clear_logs close them from the main thread
+_open_files: OrderedDict[Path, BinaryIO] = OrderedDict()
+_open_files_lock = Lock()
+# Beyond this many open log files, the least recently written one is closed
+_MAX_OPEN_FILES = 32
+
+# Writer thread, started by the first queued write and stopped by
+# shutdown_log_writer, so importing this module spawns nothing
+_log_thread: Thread | None = None
+_log_thread_lock = Lock()
 
 
 def clear_logs() -> None:
     """Remove all log files. Called on proxy startup."""
+    _close_log_files()
     if LOG_ROOT.exists():
         shutil.rmtree(LOG_ROOT)
+    _last_written.clear()
+    _last_written_key.clear()
+    _known_dirs.clear()
 
 
-def shutdown_log_executor() -> None:
-    """Drain pending writes and shut down the log thread pool."""
-    _log_executor.shutdown(wait=True)
+def set_pretty_logs(pretty: bool) -> None:
+    """Choose indented (debug) or compact JSON for Anthropic snapshot logs.
 
+    JSONL logs stay one object per line either way.
+    """
+    global _json_option
+    _json_option = orjson.OPT_INDENT_2 if pretty else 0
+
+
+def shutdown_log_writer() -> None:
+    """Drain pending writes and stop the log writer thread."""
+    global _log_thread
+    with _log_thread_lock:
+        if _log_thread is not None:
+            _log_queue.put(None)
+            _log_thread.join()
+            _log_thread = None
+    _close_log_files()
+
+
+def _submit(writer: Callable[..., Any], *args: Any) -> None:
+    """Queue a write for the writer thread (non-blocking, no future allocated)."""
+    global _dropped_writes
+    if _log_queue.qsize() >= _MAX_PENDING_WRITES:
+        with _dropped_lock:
+            _dropped_writes += 1
+        return
+    if _log_thread is None:
+        _start_log_writer()
+    _log_queue.put((writer, args))
+
+
+def _start_log_writer() -> None:
+    """Start the writer thread unless another caller already has."""
+    global _log_thread
+    with _log_thread_lock:
+        if _log_thread is None:
+            _log_thread = Thread(target=_drain_log_queue, name="log-writer", daemon=True)
+            _log_thread.start()
+
+
+def _drain_log_queue() -> None:
+    """Run queued writes in order until shutdown (runs in the writer thread).
+
+    Appended lines are flushed once the queue runs dry, so a burst of lines
+    costs one write syscall per file instead of one per line.
+    """
+    job = _log_queue.get()
+    while job is not None:
+        writer, args = job
+        # A failed write must not stop later ones, but it is noted
+        try:
+            writer(*args)
+        except Exception as e:
+            _report_failed_write(writer, args, e)
+        try:
+            job = _log_queue.get_nowait()
+        except Empty:
+            _report_dropped_writes()
+            _flush_log_files()
+            job = _log_queue.get()
 
-def extract_request_info(body: dict[str, Any]) -> tuple[str, list[str]]:
-    """Extract prompt and tool names from request body.
 
-    Returns:
-        Tuple of (prompt_text, tool_names)
-    """
-    prompt = ""
-    messages = body.get("messages", [])
-    if messages:
-        # Find first user message (contains initial prompt for subagents)
-        first_user_msg = next(
-            (m for m in messages if m.get("role") == "user"),
-            None,
+def _report_dropped_writes() -> None:
+    """Note writes dropped since the last report in the CLI log."""
+    global _dropped_writes
+    with _dropped_lock:
+        dropped, _dropped_writes = _dropped_writes, 0
+    if dropped:
+        with suppress(Exception):
+            _append_cli_log(format_cli_line("WARNING", "Log queue full", dropped=dropped))
+
+
+def _report_failed_write(
+    writer: Callable[..., Any], args: tuple[Any, ...], error: Exception
+) -> None:
+    """Note a failed log write, with its folder and exception type, in the CLI log."""
+    if writer is _write_then_append_cli_log:
+        writer, args = args[0], args[1]
+    target = args[0] if args and isinstance(args[0], Path) else writer.__name__
+    with suppress(Exception):
+        _append_cli_log(
+            format_cli_line(
+                "ERROR", "Log write failed", target=target, error=type(error).__name__
+            )
         )
-        if first_user_msg:
-            content = first_user_msg.get("content", "")
-            if isinstance(content, list):
-                texts = [
-                    b.get("text", "")
-                    for b in content
-                    if isinstance(b, dict) and b.get("type") == "text"
-                ]
-                content = " ".join(texts)
-            prompt = content.replace("\n", " ").strip() if content else ""
 
-    tools = body.get("tools", [])
-    tool_names = [t.get("name", "?") for t in tools if isinstance(t, dict)]
 
-    return prompt, tool_names
+def extract_prompt(body: dict[str, Any]) -> str:
+    """Extract the first user message text from request body, on one line."""
+    # First user message (contains initial prompt for subagents); usually
+    # messages[0], so a plain loop beats building a generator
+    for message in body.get("messages", ()):
+        if message.get("role") == "user":
+            content = message.get("content", "")
+            break
+    else:
+        return ""
+    if isinstance(content, list):
+        content = " ".join(
+            b.get("text", "") for b in content if isinstance(b, dict) and b.get("type") == "text"
+        )
+    return content.replace("\n", " ").strip() if isinstance(content, str) else ""
 
 
 def write_incoming_log(
@@ -76,8 +198,8 @@ def write_incoming_log(
         "body": body,
     }
     session_id = _extract_session_id(body)
-    folder = LOG_ROOT / "incoming" / session_id if session_id else LOG_ROOT / "incoming"
-    _log_executor.submit(_write_json, folder, payload)
+    folder = _INCOMING_DIR / session_id if session_id else _INCOMING_DIR
+    _submit(_append_jsonl, folder, payload)
 
 
 def write_zai_log(
@@ -85,21 +207,25 @@ def write_zai_log(
     headers: dict[str, str],
     *,
     path: str,
-    session_body: dict[str, Any] | None = None,
+    body_json: bytes | None = None,
+    cli_line: str | None = None,
 ) -> None:
-    """Write a single z.ai request log entry (non-blocking)."""
+    """Write a single z.ai request log entry (non-blocking).
+
+    If body_json is given (the body as already encoded for upstream), it is
+    embedded verbatim instead of serializing body again. If cli_line is given
+    (see format_cli_line), it is appended to the CLI log by the same job.
+    """
     payload = {
         "timestamp": _utc_now(),
         "target": "z.ai",
         "path": path,
         "headers": _redact_headers(headers),
-        "body": body,
+        "body": _encoded_body(body, body_json),
     }
-    # Use session_body (original with metadata) for folder extraction if provided
-    folder_body = session_body if session_body else body
-    session_id = _extract_session_id(folder_body)
-    folder = LOG_ROOT / "zai" / session_id if session_id else LOG_ROOT / "zai"
-    _log_executor.submit(_write_json, folder, payload)
+    session_id = _extract_session_id(body)
+    folder = _ZAI_DIR / session_id if session_id else _ZAI_DIR
+    _submit_with_cli_line(cli_line, _append_jsonl, folder, payload)
 
 
 def write_anthropic_log(
@@ -108,47 +234,75 @@ def write_anthropic_log(
     streaming: bool,
     *,
     path: str,
+    body_json: bytes | None = None,
+    cli_line: str | None = None,
 ) -> None:
-    """Write a single Anthropic request log entry (non-blocking)."""
+    """Write a single Anthropic request log entry (non-blocking).
+
+    If body_json is given (the body as already encoded for upstream), it is
+    embedded verbatim instead of serializing body again, and a request
+    identical to the folder's latest log is skipped. If cli_line is given
+    (see format_cli_line), it is appended to the CLI log by the same job.
+    """
     session_id = _extract_session_id(body)
-    folder = LOG_ROOT / "anthropic" / session_id if session_id else LOG_ROOT / "anthropic"
-    _log_executor.submit(_write_anthropic, folder, model, body, streaming, path)
+    folder = _ANTHROPIC_DIR / session_id if session_id else _ANTHROPIC_DIR
+    _submit_with_cli_line(
+        cli_line, _write_anthropic, folder, model, body, body_json, streaming, path
+    )
+
+
+def _submit_with_cli_line(cli_line: str | None, writer: Callable[..., Any], *args: Any) -> None:
+    """Queue a write, fused with a CLI log line into a single job if given."""
+    if cli_line is None:
+        _submit(writer, *args)
+    else:
+        _submit(_write_then_append_cli_log, writer, args, cli_line)
+
+
+def _write_then_append_cli_log(
+    writer: Callable[..., Any], args: tuple[Any, ...], cli_line: str
+) -> None:
+    """Run a log write, then append its CLI line even if the write failed."""
+    try:
+        writer(*args)
+    finally:
+        _append_cli_log(cli_line)
 
 
 def _write_anthropic(
-    folder: Path, model: str, body: dict[str, Any], streaming: bool, path: str
+    folder: Path,
+    model: str,
+    body: dict[str, Any],
+    body_json: bytes | None,
+    streaming: bool,
+    path: str,
 ) -> None:
-    """Anthropic log writer (runs in thread pool)."""
-    _cleanup_session_folder(folder)
+    """Anthropic log writer (runs in the writer thread).
+
+    Keeps only the most recent log per folder by deleting the file it
+    replaces, rather than listing the folder on every write.
+    """
+    key = None
+    if body_json is not None:
+        key = hash((model, streaming, path, body_json))
+        if _last_written_key.get(folder) == key and folder in _last_written:
+            return
     payload = {
         "timestamp": _utc_now(),
         "target": "Anthropic",
         "model": model,
         "streaming": streaming,
         "path": path,
-        "body": body,
+        "body": _encoded_body(body, body_json),
     }
-    _write_json(folder, payload)
-
-
-def _cleanup_session_folder(folder: Path) -> int:
-    """Delete all but the most recent log file in a session folder."""
-    if not folder.exists():
-        return 0
-
-    files = sorted(folder.glob("*.json"))
-    if len(files) <= 1:
-        return 0
-
-    deleted = 0
-    # Delete all but the last file (most recent by filename timestamp)
-    for old_file in files[:-1]:
-        try:
-            old_file.unlink()
-            deleted += 1
-        except OSError:
-            pass
-    return deleted
+    previous = _last_written.get(folder)
+    _last_written[folder] = _write_json(folder, payload)
+    if key is None:
+        _last_written_key.pop(folder, None)
+    else:
+        _last_written_key[folder] = key
+    if previous is not None:
+        previous.unlink(missing_ok=True)
 
 
 def write_cli_log(
@@ -157,62 +311,154 @@ def write_cli_log(
     **extra: Any,
 ) -> None:
     """Append a line to the rolling CLI log file (non-blocking)."""
-    timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
+    _submit(_append_cli_log, format_cli_line(level, message, **extra))
+
+
+def format_cli_line(
+    level: str,
+    message: str,
+    **extra: Any,
+) -> str:
+    """Format a timestamped CLI log line, as written by write_cli_log."""
+    timestamp = _timestamps(time.time_ns())[2]
     extra_str = " ".join(f"{k}={v}" for k, v in extra.items()) if extra else ""
     line = f"[{timestamp}] {level}: {message}"
     if extra_str:
         line += f" {extra_str}"
-    line += "\n"
-    _log_executor.submit(_append_cli_log, line)
+    return line + "\n"
 
 
 def _append_cli_log(line: str) -> None:
-    """Write a line to the CLI log file (runs in thread pool)."""
-    CLI_LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with CLI_LOG_FILE.open("a") as f:
-        f.write(line)
+    """Write a line to the CLI log file (runs in the writer thread)."""
+    _append(CLI_LOG_FILE, line.encode())
+
+
+def _append_jsonl(folder: Path, payload: dict[str, Any]) -> None:
+    """Append payload as one JSON line to the folder's log (runs in the writer thread)."""
+    try:
+        line = orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE, default=str)
+    except TypeError:  # orjson.JSONEncodeError, e.g. lone surrogates or huge integers
+        line = (json.dumps(payload, default=str) + "\n").encode()
+    _append(folder / _JSONL_NAME, line)
+
+
+def _append(file_path: Path, data: bytes) -> None:
+    """Append data to a log file, opening it on first use.
+
+    Handles are kept in least-recently-written order; opening one past
+    _MAX_OPEN_FILES closes the oldest, so many sessions cannot exhaust fds.
+    """
+    with _open_files_lock:
+        f = _open_files.get(file_path)
+        if f is None:
+            if len(_open_files) >= _MAX_OPEN_FILES:
+                _, oldest = _open_files.popitem(last=False)
+                with suppress(OSError):
+                    oldest.close()
+            _ensure_dir(file_path.parent)
+            f = _open_files[file_path] = file_path.open("ab")
+        else:
+            _open_files.move_to_end(file_path)
+        f.write(data)
+
+
+def _flush_log_files() -> None:
+    """Push buffered appends to the OS (runs in the writer thread)."""
+    with _open_files_lock:
+        for f in _open_files.values():
+            with suppress(OSError):
+                f.flush()
+
+
+def _close_log_files() -> None:
+    """Close all appended log files; the next write reopens them."""
+    with _open_files_lock:
+        for f in _open_files.values():
+            with suppress(OSError):
+                f.close()
+        _open_files.clear()
 
 
 def _write_json(folder: Path, payload: dict[str, Any]) -> Path:
     """Write payload to a unique JSON file in the given folder."""
-    folder.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S.%fZ")
-    file_path = folder / f"{timestamp}_{uuid4().hex}.json"
-    file_path.write_text(json.dumps(payload, indent=2, default=str))
+    _ensure_dir(folder)
+    now_ns = time.time_ns()
+    micros = now_ns // 1000 % 1_000_000
+    file_path = folder / f"{_timestamps(now_ns)[3]}.{micros:06d}Z_{next(_filename_counter):08x}.json"
+    file_path.write_bytes(orjson.dumps(payload, option=_json_option, default=str))
     return file_path
 
 
-_SAFE_SESSION_ID = re.compile(r"^[a-zA-Z0-9_-]+$")
+def _ensure_dir(folder: Path) -> None:
+    """Create folder unless this process already has (since the last clear_logs)."""
+    if folder not in _known_dirs:
+        folder.mkdir(parents=True, exist_ok=True)
+        _known_dirs.add(folder)
+
+
+def _encoded_body(body: Any, body_json: bytes | None) -> Any:
+    """Return pre-encoded body JSON as an orjson fragment, else the body."""
+    return body if body_json is None else orjson.Fragment(body_json)
+
+
+_SAFE_SESSION_ID = re.compile(r"[a-zA-Z0-9_-]+")
 
 
 def _extract_session_id(body: Any) -> str | None:
     """Extract session_id from request body metadata.user_id."""
     if not isinstance(body, dict):
         return None
-    user_id = body.get("metadata", {}).get("user_id", "")
-    if not isinstance(user_id, str) or "session_" not in user_id:
+    metadata = body.get("metadata")
+    if not isinstance(metadata, dict):
+        return None
+    user_id = metadata.get("user_id")
+    if not isinstance(user_id, str):
         return None
-    session_id = user_id.split("session_", 1)[-1]
-    if not session_id or not _SAFE_SESSION_ID.match(session_id):
+    _, found, session_id = user_id.partition("session_")
+    if not found or not _SAFE_SESSION_ID.fullmatch(session_id):
         return None
     return session_id
 
+
+_SENSITIVE_HEADER = re.compile("key|authorization", re.IGNORECASE)
+
+
 def _redact_headers(headers: dict[str, str]) -> dict[str, str]:
     """Redact sensitive headers."""
-    redacted = {}
-    for key, value in headers.items():
-        if "key" in key.lower() or "authorization" in key.lower():
-            redacted[key] = _mask(value)
-        else:
-            redacted[key] = value
-    return redacted
+    sensitive = _SENSITIVE_HEADER.search
+    return {key: _mask(value) if sensitive(key) else value for key, value in headers.items()}
 
 
 def _mask(value: str) -> str:
-    if len(value) <= 10:
-        return "***"
-    return value[:6] + "..." + value[-4:]
+    return f"{value[:6]}...{value[-4:]}" if len(value) > 10 else "***"
+
+
+# (epoch second, ISO 8601 without fraction or offset, CLI log, filename prefix)
+# for the last second formatted
+_ts_cache: tuple[int, str, str, str] = (-1, "", "", "")
+
+
+def _timestamps(now_ns: int) -> tuple[int, str, str, str]:
+    """Return formatted UTC timestamps for the second containing now_ns.
+
+    Formatting runs at most once per second; other calls reuse the cache.
+    """
+    global _ts_cache
+    second = now_ns // 1_000_000_000
+    cached = _ts_cache
+    if cached[0] != second:
+        dt = datetime.fromtimestamp(second, UTC)
+        cached = (
+            second,
+            dt.strftime("%Y-%m-%dT%H:%M:%S"),
+            dt.strftime("%Y-%m-%d %H:%M:%S"),
+            dt.strftime("%Y%m%dT%H%M%S"),
+        )
+        _ts_cache = cached
+    return cached
 
 
 def _utc_now() -> str:
-    return datetime.now(UTC).isoformat()
+    """Return the current UTC time in ISO 8601 with microseconds."""
+    now_ns = time.time_ns()
+    return f"{_timestamps(now_ns)[1]}.{now_ns // 1000 % 1_000_000:06d}+00:00"